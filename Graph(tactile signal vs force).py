@@ -1,8 +1,11 @@
 import re
 import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 import matplotlib.pyplot as plt
-from PIL import Image, ImageOps, ImageFilter
+import cv2
+from PIL import Image, ImageOps, ImageFilter, ImageDraw, ImageFont
 
 # -------------------------- Config --------------------------
 # Image paths (in the exact order you described)
@@ -33,8 +36,12 @@ def l1_abs_mean(M: np.ndarray) -> float:
     return float(np.mean(np.abs(M)))
 
 def p95_positive(M: np.ndarray) -> float:
+    # Nearest-rank 95th percentile: quickselect instead of the full sort in np.percentile
     vals = M[M > 0]
-    return float(np.percentile(vals, 95)) if vals.size else 0.0
+    if vals.size == 0:
+        return 0.0
+    k = max(0, int(np.ceil(0.95 * vals.size)) - 1)
+    return float(np.partition(vals, k)[k])
 
 REDUCE = sum_positive   # <-- default metric
 
@@ -47,15 +54,16 @@ except Exception:
     TESS_AVAILABLE = False
 
 def preprocess_for_ocr(img: Image.Image) -> Image.Image:
-    # Crop margins a bit, convert to grayscale, boost contrast, sharpen and upscale for better OCR
+    # Crop margins a bit, convert to grayscale, binarize (Otsu) and upscale for better OCR
     w, h = img.size
     img = img.crop((int(0.02*w), int(0.10*h), int(0.98*w), int(0.92*h)))  # trim headers/footers & borders
     img = ImageOps.grayscale(img)
-    img = ImageOps.autocontrast(img)
-    img = img.filter(ImageFilter.SHARPEN)
-    # Upscale
+    _, bw = cv2.threshold(np.asarray(img), 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    img = Image.fromarray(bw)
+    # Upscale: nearest + a light blur rounds the blocky edges as well as bicubic does, far cheaper
     scale = 2
-    img = img.resize((img.width*scale, img.height*scale), Image.BICUBIC)
+    img = img.resize((img.width*scale, img.height*scale), Image.NEAREST)
+    img = img.filter(ImageFilter.GaussianBlur(radius=1.0))
     return img
 
 def ocr_matrix_from_image(path: str) -> str:
@@ -66,6 +74,186 @@ def ocr_matrix_from_image(path: str) -> str:
     cfg = r'--oem 3 --psm 6 -c tessedit_char_whitelist=0123456789.-'
     return pytesseract.image_to_string(img, config=cfg)
 
+# ----------------- Template matching (no OCR) ---------------
+# The screenshots are terminal dumps from multi_thread_contact.py: 16 lines of
+# " ".join(f"{v:6.1f}") in a monospace font. Cutting each line into glyphs and
+# matching every glyph against a small rendered digit bank is far cheaper than
+# Tesseract; a read that is not confident for every digit returns None and the
+# image falls back to OCR.
+TEMPLATE_SIZE = (10, 16)         # (w, h) every glyph is normalized to
+TEMPLATE_FONTS = ["Menlo.ttc", "DejaVuSansMono.ttf", "Consolas.ttf", "Courier New.ttf"]
+# Measured on DejaVuSansMono dumps at 12-32 px against its own bank: correct digits
+# score <= 0.36 with best/second-best <= 0.75. With the cutoffs off, the only misreads
+# (12 px upscaled 1.5x, where glyphs blur together) had ratios of 0.86 and up.
+MATCH_MAX_SCORE = 0.4            # worst accepted TM_SQDIFF_NORMED score per digit
+MATCH_MAX_RATIO = 0.8            # best / second-best digit score; above it the digit is ambiguous
+SELF_CHECK_SIZES = (12, 14, 16, 20, 24, 28)   # px; the bank must read its own font at these
+
+def _normalize_glyph(level: np.ndarray) -> np.ndarray:
+    # level is ink coverage in [0, 1] over the full digit height of the line; keeping
+    # that height (not the glyph's own bbox) and the anti-aliasing helps tell apart
+    # look-alike digits such as 0/9 and 3/8; the ratio test catches the rest.
+    # Crop the columns to the ink, scale to the template height, centre horizontally
+    # (the width rounds to whole template columns, which _match absorbs by shifting)
+    xs = np.flatnonzero((level > 0.5).any(axis=0))
+    g = level[:, xs[0]:xs[-1]+1].astype(np.float32)
+    h, w = g.shape
+    tw, th = TEMPLATE_SIZE
+    w = min(tw, max(1, int(round(w*th/h))))
+    g = cv2.resize(g, (w, th), interpolation=cv2.INTER_AREA)
+    pad = tw - w
+    return np.pad(g, ((0, 0), (pad//2, pad - pad//2)))
+
+def _ink_runs(mask: np.ndarray) -> list:
+    # (start, stop) of each run of True values
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], mask.astype(np.int8), [0]))))
+    return list(zip(edges[::2], edges[1::2]))
+
+def _match(G: np.ndarray, bank: np.ndarray):
+    # TM_SQDIFF_NORMED of every glyph (row of G) against every template, each also
+    # shifted one column left/right; returns (best index, best score, best /
+    # second-best score) per glyph. Two near-equal scores (3 vs 8) mean a guess.
+    gg = (G*G).sum(1)[None, :, None]
+    tt = (bank*bank).sum(2)[:, None, :]
+    scores = ((gg + tt - 2*G @ bank.transpose(0, 2, 1)) / np.sqrt(gg*tt + 1e-12)).min(0)
+    top2 = np.partition(scores, 1, axis=1)[:, :2]
+    return scores.argmin(1), top2[:, 0], top2[:, 0] / np.maximum(top2[:, 1], 1e-12)
+
+def _render_digit_templates():
+    # Rendered once at import; None if no monospace font is installed, or if the bank
+    # cannot read its own font back at terminal sizes
+    for name in TEMPLATE_FONTS:
+        try:
+            font = ImageFont.truetype(name, 48)
+            break
+        except OSError:
+            continue
+    else:
+        return None
+    chars = "0123456789"
+    glyphs = []
+    for ch in chars:
+        canvas = Image.new("L", (64, 80), 0)
+        ImageDraw.Draw(canvas).text((8, 8), ch, fill=255, font=font)
+        glyphs.append(np.asarray(canvas) / 255.0)
+    # Same vertical window for every digit, like the text band of a screenshot line
+    rows = np.flatnonzero(np.any([g > 0.5 for g in glyphs], axis=(0, 2)))
+    tw, th = TEMPLATE_SIZE
+    bank = np.stack([_normalize_glyph(g[rows[0]:rows[-1]+1]) for g in glyphs])
+    # Zero-filled copies shifted by one column each way: (3, 10, tw*th)
+    bank = np.pad(bank, ((0, 0), (0, 0), (1, 1)))
+    bank = np.stack([bank[:, :, d:d+tw] for d in range(3)]).reshape(3, len(chars), -1)
+
+    # Self-check: spaced digits in the bank's own font must all read back within the
+    # cutoffs, otherwise clean screenshots in that very font would be rejected
+    for size in SELF_CHECK_SIZES:
+        canvas = Image.new("L", (size*2*len(chars), size*3), 0)
+        ImageDraw.Draw(canvas).text((size, size), " ".join(chars), fill=255,
+                                    font=ImageFont.truetype(name, size))
+        level = np.asarray(canvas) / 255.0
+        ys = np.flatnonzero((level > 0.5).any(axis=1))
+        level = level[ys[0]:ys[-1]+1]
+        G = np.stack([_normalize_glyph(level[:, x0:x1]).ravel()
+                      for x0, x1 in _ink_runs((level > 0.5).any(axis=0))])
+        if len(G) != len(chars):
+            return None
+        best, score, ratio = _match(G, bank)
+        if (np.any(best != np.arange(len(chars))) or score.max() > MATCH_MAX_SCORE
+                or ratio.max() > MATCH_MAX_RATIO):
+            warnings.warn(f"digit templates from {name} fail their self-check at {size} px; using OCR only")
+            return None
+    return chars, bank
+
+_DIGIT_TEMPLATES = _render_digit_templates()
+
+def _split_touching(runs: list, band: np.ndarray, line_h: int) -> list:
+    # Small fonts can join neighbouring digits ("14" at 12 px) into one run. Split a
+    # run wider than a glyph into as many pieces as single-digit widths fit, cutting
+    # at the emptiest column next to each nominal boundary.
+    digit_w = [x1 - x0 for x0, x1 in runs if x1 - x0 <= 0.9*line_h and
+               np.ptp(np.flatnonzero(band[:, x0:x1].any(axis=1))) + 1 >= 0.3*line_h]
+    if not digit_w:
+        return runs
+    digit_w = np.median(digit_w)
+    out = []
+    for x0, x1 in runs:
+        k = int(round((x1 - x0) / digit_w)) if x1 - x0 > 0.9*line_h else 1
+        if k <= 1:
+            out.append((x0, x1))
+            continue
+        ink = band[:, x0:x1].sum(axis=0)
+        cuts = []
+        for j in range(1, k):
+            c = int(round(j*(x1 - x0)/k))
+            near = [x for x in (c, c - 1, c + 1) if 0 < x < x1 - x0]
+            cuts.append(x0 + min(near, key=lambda x: ink[x]))
+        bounds = [x0] + cuts + [x1]
+        out += list(zip(bounds[:-1], bounds[1:]))
+    return out
+
+def _read_line(band: np.ndarray, level: np.ndarray):
+    # Returns (text, worst digit score, worst best/second-best ratio); glyphs are the
+    # column runs of ink, so the spaces simply drop out
+    chars, bank = _DIGIT_TEMPLATES
+    line_h = band.shape[0]
+    out, glyphs = [], []
+    for x0, x1 in _split_touching(_ink_runs(band.any(axis=0)), band, line_h):
+        cell = band[:, x0:x1]
+        ys = np.flatnonzero(cell.any(axis=1))
+        h, w = ys[-1] - ys[0] + 1, x1 - x0
+        if h < 0.3*line_h:                      # too short for a digit
+            out.append('-' if w > 1.5*h else '.')
+            continue
+        if w > 0.9*h:                           # touching glyphs that would not split
+            return "", np.inf, np.inf
+        out.append(None)
+        glyphs.append(_normalize_glyph(level[:, x0:x1]).ravel())
+    if not glyphs:
+        return "".join(out), 0.0, 0.0
+    best, score, ratio = _match(np.stack(glyphs), bank)
+    digits = iter(chars[i] for i in best)
+    text = "".join(ch if ch is not None else next(digits) for ch in out)
+    return text, float(score.max()), float(ratio.max())
+
+_FIELD_RE = re.compile(r'-?\d+\.\d')
+
+def template_matrix_from_image(path: str):
+    """
+    Reads the matrix by template matching instead of OCR.
+    Returns None when the image does not look like the expected terminal dump.
+    """
+    if _DIGIT_TEMPLATES is None:
+        return None
+    gray = np.asarray(ImageOps.grayscale(Image.open(path)))
+    _, ink = cv2.threshold(gray, 0, 1, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    if ink.mean() > 0.5:                        # dark text on a light background
+        ink = 1 - ink
+    ink = ink.astype(bool)
+    fg, bg = np.median(gray[ink]), np.median(gray[~ink])
+    level = np.clip((gray.astype(np.float32) - bg) / (fg - bg), 0.0, 1.0)
+
+    # Matrix rows are the text lines of typical (median) height; rulers are shorter
+    # and the "Frame #..." header, if it survives, comes first
+    bands = _ink_runs(ink.any(axis=1))
+    if len(bands) < ROWS:
+        return None
+    med_h = np.median([b - a for a, b in bands])
+    rows = [(a, b) for a, b in bands if abs((b - a) - med_h) <= 0.25*med_h + 1][-ROWS:]
+    if len(rows) < ROWS:
+        return None
+
+    # Every value is printed with exactly one decimal, so the glyph string splits
+    # into fields unambiguously even where neighbouring values touch ("12.3-4.5")
+    M = np.empty((ROWS, COLS))
+    for r, (a, b) in enumerate(rows):
+        text, worst, ratio = _read_line(ink[a:b], level[a:b])
+        fields = _FIELD_RE.findall(text)
+        if (worst > MATCH_MAX_SCORE or ratio > MATCH_MAX_RATIO
+                or len(fields) != COLS or "".join(fields) != text):
+            return None
+        M[r] = [float(f) for f in fields]
+    return M
+
 # -------------------- Parsing utilities ---------------------
 def normalize_minus_signs(text: str) -> str:
     # Replace Unicode minus/dash variants with ASCII hyphen
@@ -76,120 +264,147 @@ def normalize_minus_signs(text: str) -> str:
             .replace('·', '.')  # stray middots to dots if any
             )
 
+# Separators OCR sometimes emits between numbers; mapped to spaces in one pass
+_SEPARATORS = str.maketrans({',': ' ', '|': ' ', '\t': ' '})
+_HEADER_RE = re.compile(r'^.*Frame\s*#?\d+.*$', re.M)
+_NUM_RE = re.compile(r'[-+]?\d+(?:\.\d+)?')
+
+def _parse_numbers(line: str) -> np.ndarray:
+    # Tokenize in NumPy's C loop; stray OCR glyphs fall back to the regex scan
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', DeprecationWarning)  # NumPy < 2 only warns
+            return np.fromstring(line, sep=' ')
+    except (ValueError, DeprecationWarning):
+        return np.array([float(x) for x in _NUM_RE.findall(line)])
+
 def extract_matrix_from_text(text: str, expect_shape=(ROWS, COLS)) -> np.ndarray:
     """
     Accepts raw OCRed text, returns a 16x16 float array.
     We look for rows of numbers (including negatives and decimals).
     """
-    text = normalize_minus_signs(text)
-    lines = [ln.strip() for ln in text.splitlines()]
+    text = normalize_minus_signs(text).translate(_SEPARATORS)
     # Remove obvious header/footer lines (e.g., 'Frame #xxxx – Contact Data (median-subtracted)')
-    lines = [ln for ln in lines if not re.search(r'Frame\s*#?\d+', ln)]
+    text = _HEADER_RE.sub('', text)
+    lines = [ln.strip() for ln in text.splitlines()]
     lines = [ln for ln in lines if not set(ln) <= set('= -')]  # drop ruler lines like "====", "----"
 
     rows = []
-    num_re = re.compile(r'[-+]?\d+(?:\.\d+)?')
-
     for ln in lines:
-        nums = [float(x) for x in num_re.findall(ln)]
-        if len(nums) >= 8:   # heuristically keep lines that look like matrix rows
+        nums = _parse_numbers(ln)
+        if nums.size >= 8:   # heuristically keep lines that look like matrix rows
             rows.append(nums)
 
-    # If lines are wrapped, we might have too many columns; try to fold to COLS
-    cleaned = []
-    for r in rows:
-        # If too few numbers, skip
-        if len(r) < 4:
-            continue
-        cleaned.extend(r)
-
     # Strategy:
-    # 1) If we collected exactly ROWS lines and each looks near COLS, try line-wise trim/pad
-    # 2) Otherwise, fall back to flat reshape if total count matches ROWS*COLS
+    # 1) If the rows hold at least ROWS*COLS numbers, reshape the flat run directly
+    # 2) Otherwise, if it looks like 16 rows, trim/pad each line to COLS
 
     # Try reshape directly first
     total_needed = expect_shape[0]*expect_shape[1]
-    if len(cleaned) >= total_needed:
-        arr = np.array(cleaned[:total_needed], dtype=float).reshape(expect_shape)
-        return arr
+    flat = np.concatenate(rows) if rows else np.empty(0)
+    if flat.size >= total_needed:
+        return flat[:total_needed].reshape(expect_shape)
 
     # Fallback: try to assemble per-line if it looks like 16 rows
     if len(rows) >= ROWS:
-        candidate = []
-        for r in rows[:ROWS]:
-            if len(r) >= COLS:
-                candidate.append(r[:COLS])
-            else:
-                # right-pad with zeros if a short OCR row
-                candidate.append(r + [0.0]*(COLS-len(r)))
-        return np.array(candidate, dtype=float)
+        candidate = np.zeros((ROWS, COLS))   # right-pad with zeros if a short OCR row
+        for i, r in enumerate(rows[:ROWS]):
+            n = min(r.size, COLS)
+            candidate[i, :n] = r[:n]
+        return candidate
 
     raise ValueError("Could not parse a {}x{} matrix from text".format(*expect_shape))
 
 # -------------------- Main pipeline -------------------------
-forces = []
-signals = []
-matrices = []
-
-for f, p in paths:
-    print(f"\nProcessing {p} (Force = {f} N)")
-    text = None
-    # Try OCR first
-    if TESS_AVAILABLE:
+def process_one(item):
+    """
+    Reads one screenshot (template matching, then OCR) in a worker process.
+    Returns (force, path, matrix or None, OCR text or None, messages to print).
+    """
+    f, p = item
+    M, text, notes = None, None, []
+    # Try template matching first; it only accepts the known terminal-dump layout
+    try:
+        M = template_matrix_from_image(p)
+    except Exception as e:
+        notes.append(f"  Template read failed: {e}")
+
+    # Then OCR, only for images the template reader was not confident about
+    if M is None and TESS_AVAILABLE:
         try:
             text = ocr_matrix_from_image(p)
         except Exception as e:
-            print(f"  OCR failed: {e}")
-
-    # If OCR not available or failed, ask for manual paste
-    if not text:
-        print("  Please paste the matrix text for this image (end with an empty line):")
-        lines = []
-        while True:
-            try:
-                ln = input()
-            except EOFError:
-                break
-            if ln.strip() == "":
-                break
-            lines.append(ln)
-        text = "\n".join(lines)
+            notes.append(f"  OCR failed: {e}")
+    return f, p, M, text, notes
 
-    try:
-        M = extract_matrix_from_text(text, expect_shape=(ROWS, COLS))
-        matrices.append(M)
-        forces.append(f)
-        sig = REDUCE(M)
-        signals.append(sig)
-        print(f"  Parsed {M.shape} | signal={sig:.3f} (metric={REDUCE.__name__})")
-    except Exception as e:
-        print(f"  Parse error for {p}: {e}")
-
-# -------------------- Save & Plot ---------------------------
-if len(signals) >= 2:
-    # Save CSV of signals and a separate npy of full matrices
-    import csv
-    out_csv = "tactile_signal_vs_force.csv"
-    with open(out_csv, "w", newline="") as fp:
-        writer = csv.writer(fp)
-        writer.writerow(["Force_N", f"Signal_{REDUCE.__name__}"])
-        for f, s in zip(forces, signals):
-            writer.writerow([f, s])
-    np.save("matrices_16x16.npy", np.array(matrices, dtype=float))
-    print(f"\nSaved: {out_csv} and matrices_16x16.npy")
-
-    # Sort by force (descending to match your order, or ascending if you prefer)
-    order = np.argsort(forces)
-    F = np.array(forces)[order]
-    S = np.array(signals)[order]
-
-    plt.figure()
-    plt.plot(F, S, marker='o')   # (per UI rules: single-plot, no style/colors specified)
-    plt.xlabel("Force (N)")
-    plt.ylabel(f"Tactile Signal ({REDUCE.__name__})")
-    plt.title("Tactile Signal vs Force")
-    plt.grid(True, which='both', linestyle='--', linewidth=0.5)
-    plt.tight_layout()
-    plt.show()
-else:
-    print("\nNot enough valid points to plot.")
+def main():
+    forces = []
+    signals = []
+    matrices = []
+
+    # Images are independent: read them all in parallel, then finish in order here
+    with ProcessPoolExecutor(max_workers=min(len(paths), os.cpu_count() or 1)) as ex:
+        results = list(ex.map(process_one, paths))
+
+    for f, p, M, text, notes in results:
+        print(f"\nProcessing {p} (Force = {f} N)")
+        for note in notes:
+            print(note)
+
+        # If OCR not available or failed, ask for manual paste (needs the console, so not in a worker)
+        if M is None and not text:
+            print("  Please paste the matrix text for this image (end with an empty line):")
+            lines = []
+            while True:
+                try:
+                    ln = input()
+                except EOFError:
+                    break
+                if ln.strip() == "":
+                    break
+                lines.append(ln)
+            text = "\n".join(lines)
+
+        try:
+            if M is None:
+                M = extract_matrix_from_text(text, expect_shape=(ROWS, COLS))
+            matrices.append(M)
+            forces.append(f)
+            sig = REDUCE(M)
+            signals.append(sig)
+            print(f"  Parsed {M.shape} | signal={sig:.3f} (metric={REDUCE.__name__})")
+        except Exception as e:
+            print(f"  Parse error for {p}: {e}")
+
+    # -------------------- Save & Plot ---------------------------
+    if len(signals) >= 2:
+        # Save CSV of signals and a separate compressed npz of full matrices (+ forces)
+        import csv
+        out_csv = "tactile_signal_vs_force.csv"
+        with open(out_csv, "w", newline="") as fp:
+            writer = csv.writer(fp)
+            writer.writerow(["Force_N", f"Signal_{REDUCE.__name__}"])
+            for f, s in zip(forces, signals):
+                writer.writerow([f, s])
+        M = np.array(matrices, dtype=np.float32)   # one-decimal dumps: float32 is plenty
+        np.savez_compressed("matrices_16x16.npz", matrices=M, forces=np.asarray(forces, dtype=np.float32))
+        print(f"\nSaved: {out_csv} and matrices_16x16.npz")
+
+        # Sort by force (descending to match your order, or ascending if you prefer)
+        order = np.argsort(forces)
+        F = np.array(forces)[order]
+        S = np.array(signals)[order]
+
+        plt.figure()
+        plt.plot(F, S, marker='o')   # (per UI rules: single-plot, no style/colors specified)
+        plt.xlabel("Force (N)")
+        plt.ylabel(f"Tactile Signal ({REDUCE.__name__})")
+        plt.title("Tactile Signal vs Force")
+        plt.grid(True, which='both', linestyle='--', linewidth=0.5)
+        plt.tight_layout()
+        plt.show()
+    else:
+        print("\nNot enough valid points to plot.")
+
+if __name__ == "__main__":
+    main()
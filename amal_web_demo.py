@@ -3,21 +3,50 @@ import serial
 import threading
 import cv2
 import time
-from scipy.ndimage import gaussian_filter
+import itertools
+import os
+import zlib
 from flask import Flask, Response
 import socket
+import socketserver
+from numba import njit
+
+# simplejpeg (libjpeg-turbo) encodes faster than cv2.imencode and returns bytes directly;
+# cv2 is the fallback when it is not installed
+try:
+    import simplejpeg
+    SIMPLEJPEG_AVAILABLE = True
+except ImportError:
+    SIMPLEJPEG_AVAILABLE = False
+
+# waitress runs the Flask app on a real thread pool; the Werkzeug dev server is the fallback
+try:
+    from waitress import serve as waitress_serve
+    WAITRESS_AVAILABLE = True
+except ImportError:
+    WAITRESS_AVAILABLE = False
 
 # -------------------- CONFIG --------------------
 MATRIX_SIZE = 16
 THRESHOLD = 12
 NOISE_SCALE = 60
 ALPHA = 0.2
+USE_TEMPORAL_FILTER = False   # blend each frame with the previous one (weight ALPHA on the new frame)
 GAUSS_SIGMA = 0.0
 BAUD = 2000000
 WEB_HOST = "0.0.0.0"
 WEB_PORT = 6900
+USE_RAW_MJPEG_SERVER = True   # serve over a bare socketserver (no WSGI per chunk); False → Flask
+WEB_THREADS = 8               # Flask/waitress worker threads; each open stream holds one
+STREAM_FORMAT = "png"   # "png" → lossless native 16x16 frames, browser upscales; "jpeg" → STREAM_SIZE JPEG
+STREAM_SIZE = 128   # server-side upscale (px) for JPEG; browser scales the rest. 0 → native 16x16
+JPEG_QUALITY = 70
+JPEG_MIN_QUALITY = 50   # quality a JPEG stream drops to while its client can't keep up
+CLIENT_COLORMAP = True   # stream grayscale and apply VIRIDIS in the browser (1/3 the JPEG input)
 CLEAR_THRESHOLD_COUNTS = 2
 IDLE_BASELINE_BETA = 0.2
+CALIB_CACHE_MAX_AGE_SEC = 3600   # reuse a cached baseline younger than this; 0 → always recapture
+BASELINE_FRAMES = 30             # unloaded frames whose per-taxel median becomes the baseline
 
 # Absolute force-based normalization (maps Newtons to colors)
 USE_FORCE_NORM = False           # True → normalize by MAX_FORCE_N (Newtons)
@@ -33,114 +62,286 @@ ABSOLUTE_MAX = 100   # counts that map to full brightness
 PORT = '/dev/cu.usbserial-AQ02VE0X'
 
 # ------------------------------------------------
-contact_data_norm = np.zeros((MATRIX_SIZE, MATRIX_SIZE))
-flag = False
+contact_data_norm = np.zeros((MATRIX_SIZE, MATRIX_SIZE), dtype=np.float32)
 app = Flask(__name__)
-_prev_frame = None  # set in main
 _force_gain_calibrated = False
+_recalibrate = threading.Event()
+_frame_cv = threading.Condition()   # guards the contact_data_norm hand-off; notified per frame
+_frame_stats = (0.0, 0.0)           # (total_counts, peak_counts) of contact_data_norm, from the kernel
+_frame_seq = 0                      # bumped with every published frame (under _frame_cv)
+_IDLE_EMA_ENABLED = 0.0 < IDLE_BASELINE_BETA <= 1.0
+_streams = {}                       # stream id → per-client counters, served by /metrics
+_streams_lock = threading.Lock()
+_stream_ids = itertools.count(1)
 
 # Terminal stats configuration
 ENABLE_STATS = True
 STATS_PERIOD_SEC = 1.0
 
 
-# -------------------- SERIAL READING THREAD --------------------
-def readThread(serDev):
-    global contact_data_norm, flag
+# -------------------- KERNELS --------------------
+@njit(cache=True, fastmath=True)
+def process_frame(frame, median, out, prev, alpha, threshold, clear_thr, scale):
+    # Baseline removal, noise floor, ghost clearing, normalization and temporal
+    # smoothing against prev (alpha=1 → off) in a single pass into out.
+    # Returns the unsmoothed (total_counts, peak_counts).
+    rows, cols = frame.shape
+    total = 0.0
+    peak = 0.0
+    for i in range(rows):
+        for j in range(cols):
+            c = frame[i, j] - median[i, j] - threshold
+            if c < 0.0 or c < clear_thr:
+                c = 0.0
+            total += c
+            if c > peak:
+                peak = c
+            v = c * scale
+            if v > 1.0:
+                v = 1.0
+            out[i, j] = alpha * v + (1.0 - alpha) * prev[i, j]
+    return total, peak
+
+
+@njit(cache=True, fastmath=True)
+def update_median(median, frame, beta):
+    # In-place EMA of the baseline towards frame (idle drift compensation)
+    rows, cols = frame.shape
+    for i in range(rows):
+        for j in range(cols):
+            median[i, j] += beta * (frame[i, j] - median[i, j])
+
+
+@njit(cache=True)
+def parse_row_bytes(buf, out):
+    # Parse whitespace-separated signed ASCII integers from a uint8 buffer into
+    # out (int16). Returns the number of values seen, or -1 on any other byte or
+    # on a value outside the int16 range (it would wrap silently on store).
+    n = out.shape[0]
+    count = 0
+    acc = 0
+    sign = 1
+    in_tok = False
+    has_digit = False
+    for k in range(buf.shape[0] + 1):
+        b = buf[k] if k < buf.shape[0] else 32
+        if 48 <= b <= 57:
+            acc = acc * 10 + (b - 48)
+            if acc > 32768:
+                return -1
+            in_tok = True
+            has_digit = True
+        elif b == 32 or b == 9 or b == 10 or b == 13:
+            if in_tok:
+                if not has_digit or sign * acc > 32767:
+                    return -1
+                if count < n:
+                    out[count] = sign * acc
+                count += 1
+                acc = 0
+                sign = 1
+                in_tok = False
+                has_digit = False
+        elif (b == 45 or b == 43) and not in_tok:
+            if b == 45:
+                sign = -1
+            in_tok = True
+        else:
+            return -1
+    return count
+
+
+@njit(cache=True)
+def median_axis0(buf, out):
+    # Per-taxel median over the first axis of buf (frames x rows x cols).
+    # Insertion sort beats np.median's generic path at baseline sizes (~30).
+    n, rows, cols = buf.shape
+    tmp = np.empty(n, dtype=np.float32)
+    for i in range(rows):
+        for j in range(cols):
+            for k in range(n):
+                v = buf[k, i, j]
+                m = k
+                while m > 0 and tmp[m - 1] > v:
+                    tmp[m] = tmp[m - 1]
+                    m -= 1
+                tmp[m] = v
+            if n % 2:
+                out[i, j] = tmp[n // 2]
+            else:
+                out[i, j] = 0.5 * (tmp[n // 2 - 1] + tmp[n // 2])
 
-    data_tac = []
-    num = 0
-    backup = None
-    current = None
-    flag = False
-
-    print("Collecting baseline frames...")
 
-    # ---------- BASELINE CAPTURE ----------
+# -------------------- SERIAL READING THREAD --------------------
+def _read_frames(serDev, frame):
+    # Yields every time a complete MATRIX_SIZE x MATRIX_SIZE frame has been parsed into frame
+    rx = bytearray()
+    row_idx = -1  # rows of the current frame; -1 until the first frame boundary
     while True:
-        if serDev.in_waiting > 0:
-            try:
-                line = serDev.readline().decode('utf-8', errors='ignore').strip()
-            except:
-                line = ""
-            if len(line) < 10:
-                if current is not None and len(current) == MATRIX_SIZE:
-                    backup = np.array(current)
-                    data_tac.append(backup)
-                    num += 1
-                    print(f"Baseline frame {num}/30", end='\r')
-                    if num >= 30:
-                        break
-                current = []
-                continue
-            if current is not None:
-                try:
-                    int_values = [int(val) for val in line.split()]
-                    current.append(int_values)
-                except ValueError:
+        # One bulk read per wake-up instead of a readline() per row; blocks for
+        # at most the port timeout when nothing is pending
+        try:
+            rx += serDev.read(max(1, serDev.in_waiting))
+        except serial.SerialException:
+            time.sleep(0.05)
+            continue
+
+        # Parse every complete line in place (no per-line copy or memmove), then
+        # drop the consumed bytes with a single compaction per read
+        pos = 0
+        with memoryview(rx) as mv:
+            while True:
+                nl = rx.find(b"\n", pos)
+                if nl == -1:
+                    break
+                start, pos = pos, nl + 1
+
+                # A row of MATRIX_SIZE values is at least 2*MATRIX_SIZE-1 bytes, so only
+                # shorter lines can be frame boundaries and need stripping
+                if nl - start < 2 * MATRIX_SIZE and len(rx[start:nl].strip()) < 10:
+                    if row_idx == MATRIX_SIZE:
+                        yield
+                    row_idx = 0
                     continue
 
-    data_tac = np.array(data_tac)
-    median = np.median(data_tac, axis=0)
-    flag = True
+                if 0 <= row_idx < MATRIX_SIZE:
+                    if parse_row_bytes(np.frombuffer(mv[start:nl], dtype=np.uint8), frame[row_idx]) == MATRIX_SIZE:
+                        row_idx += 1
+                elif row_idx == MATRIX_SIZE:
+                    row_idx += 1  # too many rows; drop this frame
+        del rx[:pos]
+
+
+def _calib_cache_path() -> str:
+    # Keyed by device so several sensors can share a working directory
+    return f".calib_{zlib.crc32(PORT.encode()):08x}.npy"
+
+
+def _load_cached_baseline():
+    path = _calib_cache_path()
+    try:
+        if time.time() - os.path.getmtime(path) > CALIB_CACHE_MAX_AGE_SEC:
+            return None
+        median = np.load(path)
+    except (OSError, ValueError):
+        return None
+    if median.shape != (MATRIX_SIZE, MATRIX_SIZE):
+        return None
+    # update_median works in place and the kernels are compiled for a float32 C-order
+    # baseline; a cache written by an older build may be float64
+    return np.ascontiguousarray(median, dtype=np.float32)
+
+
+def _capture_baseline(frames, frame):
+    print("Collecting baseline frames...")
+    # Frames are parsed straight into their slot; no per-frame copies or list → array
+    data_tac = np.empty((BASELINE_FRAMES, MATRIX_SIZE, MATRIX_SIZE), dtype=np.int16)
+    n = 0
+    for _ in frames:
+        data_tac[n] = frame
+        n += 1
+        print(f"Baseline frame {n}/{BASELINE_FRAMES}", end='\r')
+        if n >= BASELINE_FRAMES:
+            break
+
+    median = np.empty((MATRIX_SIZE, MATRIX_SIZE), dtype=np.float32)
+    median_axis0(data_tac[:n], median)
+    try:
+        np.save(_calib_cache_path(), median)
+    except OSError as e:
+        print(f"\n⚠️ Could not cache baseline: {e}")
     print("\nBaseline initialization complete ✅")
+    return median
+
+
+def _make_frame_processor(alpha):
+    # Bind the normalization mode and constants once; the returned call does no
+    # config lookups or branching per frame. Rebuilt if FORCE_GAIN is recalibrated.
+    threshold = float(THRESHOLD)
+    clear_thr = float(CLEAR_THRESHOLD_COUNTS)
+    if USE_FORCE_NORM:
+        scale = float(FORCE_GAIN) / float(MAX_FORCE_N)
+    else:
+        scale = 1.0 / float(ABSOLUTE_MAX)
+
+    def process(frame, median, out, prev):
+        return process_frame(frame, median, out, prev, alpha, threshold, clear_thr, scale)
+    return process
+
+
+def readThread(serDev):
+    global contact_data_norm, _force_gain_calibrated, FORCE_GAIN, _frame_stats, _frame_seq
+
+    frame = np.empty((MATRIX_SIZE, MATRIX_SIZE), dtype=np.int16)
+    frames = _read_frames(serDev, frame)
+    # Two output buffers: the kernel fills one while the stream reads the other
+    norm_bufs = (np.zeros((MATRIX_SIZE, MATRIX_SIZE), dtype=np.float32),
+                 np.zeros((MATRIX_SIZE, MATRIX_SIZE), dtype=np.float32))
+    back = 0
+    alpha = ALPHA if USE_TEMPORAL_FILTER else 1.0
+
+    # ---------- BASELINE CAPTURE ----------
+    median = _load_cached_baseline()
+    if median is None:
+        median = _capture_baseline(frames, frame)
+    else:
+        print(f"Loaded cached baseline from {_calib_cache_path()} ✅")
 
     # ---------- MAIN LOOP ----------
-    while True:
-        if serDev.in_waiting > 0:
-            try:
-                line = serDev.readline().decode('utf-8', errors='ignore').strip()
-            except:
-                line = ""
-
-            if len(line) < 10:
-                if current is not None and len(current) == MATRIX_SIZE:
-                    backup = np.array(current)
-                current = []
-                if backup is not None:
-                    # Remove baseline and noise floor
-                    contact_data = backup - median - THRESHOLD
-                    contact_data = np.clip(contact_data, 0, None)
-
-                    # Remove tiny ghost values
-                    if CLEAR_THRESHOLD_COUNTS > 0:
-                        contact_data[contact_data < CLEAR_THRESHOLD_COUNTS] = 0
-
-                    # Absolute force-based normalization or absolute counts
-                    if USE_FORCE_NORM:
-                        global _force_gain_calibrated, FORCE_GAIN
-                        if AUTO_CALIBRATE_FORCE_GAIN and not _force_gain_calibrated and KNOWN_FORCE_N > 0:
-                            peak_counts = float(contact_data.max())
-                            if peak_counts >= 1.0:
-                                FORCE_GAIN = KNOWN_FORCE_N / peak_counts
-                                _force_gain_calibrated = True
-                                print(f"Calibrated FORCE_GAIN={FORCE_GAIN:.5f} N/count from peak={peak_counts:.1f} for {KNOWN_FORCE_N} N")
-                        force_map = contact_data * float(FORCE_GAIN)
-                        contact_data_norm = np.clip(force_map / float(MAX_FORCE_N), 0, 1)
-                    else:
-                        contact_data_norm = np.clip(contact_data / float(ABSOLUTE_MAX), 0, 1)
-
-                    # When idle (no contact), slowly adapt baseline to remove drift
-                    if float(contact_data.sum()) == 0.0 and 0.0 < IDLE_BASELINE_BETA <= 1.0:
-                        median = (1.0 - IDLE_BASELINE_BETA) * median + IDLE_BASELINE_BETA * backup
-
-                continue
-
-            if current is not None:
-                try:
-                    int_values = [int(val) for val in line.split()]
-                    current.append(int_values)
-                except ValueError:
-                    continue
+    process = _make_frame_processor(alpha)
+    calibrating = (USE_FORCE_NORM and AUTO_CALIBRATE_FORCE_GAIN and not _force_gain_calibrated
+                   and KNOWN_FORCE_N > 0)
+    for _ in frames:
+        if _recalibrate.is_set():
+            _recalibrate.clear()
+            median = _capture_baseline(frames, frame)
+            continue
+
+        # The front buffer still holds the last published (smoothed) frame
+        out, prev = norm_bufs[back], norm_bufs[back ^ 1]
+        total_counts, peak_counts = process(frame, median, out, prev)
+
+        # Auto-calibrate FORCE_GAIN on the first strong frame, then redo this frame
+        if calibrating and peak_counts >= 1.0:
+            FORCE_GAIN = KNOWN_FORCE_N / peak_counts
+            _force_gain_calibrated = True
+            calibrating = False
+            print(f"Calibrated FORCE_GAIN={FORCE_GAIN:.5f} N/count from peak={peak_counts:.1f} for {KNOWN_FORCE_N} N")
+            process = _make_frame_processor(alpha)
+            total_counts, peak_counts = process(frame, median, out, prev)
+        with _frame_cv:
+            contact_data_norm = out
+            _frame_stats = (total_counts, peak_counts)
+            _frame_seq += 1
+            _frame_cv.notify_all()
+        back ^= 1
+
+        # When idle (no contact), slowly adapt baseline to remove drift; the kernel's
+        # total is zero exactly when no taxel survived thresholding
+        if _IDLE_EMA_ENABLED and total_counts == 0.0:
+            update_median(median, frame, IDLE_BASELINE_BETA)
 
 
 # -------------------- FILTERS --------------------
-def apply_gaussian_blur(contact_map, sigma=GAUSS_SIGMA):
-    return gaussian_filter(contact_map, sigma=sigma)
+def _gaussian_kernel(sigma):
+    # Normalized 1-D taps over ±round(2σ) (3 taps for σ≈0.6); tails beyond that are < 1%
+    radius = max(1, int(2.0 * sigma + 0.5))
+    x = np.arange(-radius, radius + 1, dtype=np.float32)
+    k = np.exp(-0.5 * (x / sigma) ** 2)
+    return (k / k.sum()).astype(np.float32)
 
 
-def temporal_filter(new_frame, prev_frame, alpha=ALPHA):
-    return alpha * new_frame + (1 - alpha) * prev_frame
+_GAUSS_KERNELS = {}  # sigma → 1-D taps, built on first use
+
+
+def apply_gaussian_blur(contact_map, sigma=GAUSS_SIGMA):
+    # Works on the native 16x16 uint8 frame; BORDER_REFLECT matches scipy's default
+    if sigma <= 0:
+        return contact_map
+    k = _GAUSS_KERNELS.get(sigma)
+    if k is None:
+        k = _GAUSS_KERNELS[sigma] = _gaussian_kernel(sigma)
+    return cv2.sepFilter2D(contact_map, -1, k, k, borderType=cv2.BORDER_REFLECT)
 
 
 # -------------------- WEB STREAM --------------------
@@ -155,48 +356,192 @@ def _get_local_ip() -> str:
         return "127.0.0.1"
 
 
+# Baseline (non-progressive, default Huffman) JPEG: nothing in MJPEG benefits from the extra passes
+# (one list per quality level the adaptive stream switches between)
+_JPEG_PARAMS = {q: [int(cv2.IMWRITE_JPEG_QUALITY), q,
+                    int(cv2.IMWRITE_JPEG_OPTIMIZE), 0,
+                    int(cv2.IMWRITE_JPEG_PROGRESSIVE), 0,
+                    int(cv2.IMWRITE_JPEG_CHROMA_QUALITY), q]
+                for q in (JPEG_QUALITY, JPEG_MIN_QUALITY)}
+
+
+def _encode_jpeg(img, quality=JPEG_QUALITY):
+    # Grayscale (H, W) or BGR (H, W, 3) uint8 → JPEG bytes, or None on failure
+    if SIMPLEJPEG_AVAILABLE:
+        if img.ndim == 2:
+            return simplejpeg.encode_jpeg(img[:, :, None], quality=quality, colorspace='GRAY')
+        return simplejpeg.encode_jpeg(img, quality=quality, colorspace='BGR', colorsubsampling='420')
+    ok, buf = cv2.imencode('.jpg', img, _JPEG_PARAMS[quality])
+    return buf.tobytes() if ok else None
+
+
+_PNG_PARAMS = [int(cv2.IMWRITE_PNG_COMPRESSION), 1]  # 16x16 frames: zlib level barely matters
+
+
+def _encode_frame(img, quality=JPEG_QUALITY):
+    # Stream frame → (image bytes or None) in STREAM_FORMAT; quality only applies to JPEG
+    if STREAM_FORMAT == "png":
+        ok, buf = cv2.imencode('.png', img, _PNG_PARAMS)
+        return buf.tobytes() if ok else None
+    return _encode_jpeg(img, quality)
+
+
+def _upscale_nearest(img, size):
+    # Single channel by an integer factor: np.repeat beats OpenCV's generic resize
+    # dispatch (about 5x at 512 px). For BGR, cv2.resize is still the faster one.
+    f, rem = divmod(size, img.shape[0])
+    if img.ndim == 2 and rem == 0 and img.shape[0] == img.shape[1]:
+        return np.repeat(np.repeat(img, f, axis=0), f, axis=1)
+    return cv2.resize(img, (size, size), interpolation=cv2.INTER_NEAREST)
+
+
 def _mjpeg_generator(target_fps: float = 30.0):
-    global _prev_frame
     min_interval = 1.0 / max(1.0, target_fps)
+    # Per-frame cost (encode + the write the client's socket blocks on), as an EMA in ms.
+    # Above 80% of the frame budget the stream drops to JPEG_MIN_QUALITY; it goes back
+    # up only once the cost falls under 40%, so it doesn't flap between the two
+    slow_ms = 0.8 * min_interval * 1000.0
+    recovered_ms = 0.4 * min_interval * 1000.0
     last_send = 0.0
     boundary = b'--frame\r\n'
-    headers = b'Content-Type: image/jpeg\r\n\r\n'
+    headers = b'Content-Type: image/png\r\n\r\n' if STREAM_FORMAT == "png" else b'Content-Type: image/jpeg\r\n\r\n'
     last_stats = 0.0
-    while True:
-        if flag:
-            if _prev_frame is None:
-                _prev_frame = np.zeros_like(contact_data_norm)
-
-            _prev_frame = contact_data_norm
-
+    # Per-stream scratch (one set per client, so concurrent streams never share):
+    # float staging, the 8-bit visual and its last-encoded twin, the VIRIDIS gather
+    scaled = np.empty((MATRIX_SIZE, MATRIX_SIZE), dtype=np.float32)
+    vis = np.empty((MATRIX_SIZE, MATRIX_SIZE), dtype=np.uint8)
+    last_vis = np.empty_like(vis)
+    colored = np.empty((MATRIX_SIZE, MATRIX_SIZE, 3), dtype=np.uint8)
+    # Last encoded frame: an unchanged image (e.g. idle sensor) is resent, not re-encoded
+    jpg = None
+    jpg_quality = None   # quality jpg was encoded at; a change forces a re-encode
+    seen_seq = 0   # _frame_seq's initial value: nothing is sent before readThread's first frame
+    done_seq = 0   # _frame_seq when the last send finished
+    quality = JPEG_QUALITY
+    # sent: frames written; throttled: frames superseded while waiting out the target_fps
+    # interval; missed: frames published while encoding/writing (client backpressure)
+    metrics = {"sent": 0, "throttled": 0, "missed": 0, "frame_ms": 0.0}
+    if STREAM_FORMAT != "png":
+        metrics["quality"] = quality
+    with _streams_lock:
+        stream_id = next(_stream_ids)
+        _streams[stream_id] = metrics
+    try:
+        while True:
+            # Wait out the rest of the frame interval first, then send whatever is newest:
+            # dropping early frames instead would undershoot target_fps and could leave
+            # the page on a stale frame if publishing stalls
+            remaining = last_send + min_interval - time.time()
+            if remaining > 0:
+                time.sleep(remaining)
+            with _frame_cv:
+                # Sleep until readThread publishes a frame this stream has not seen yet;
+                # unlike an event pulse, a frame published between two waits is not missed
+                if not _frame_cv.wait_for(lambda: _frame_seq != seen_seq, timeout=0.5):
+                    continue
+                if seen_seq:
+                    metrics["throttled"] += max(0, _frame_seq - done_seq - 1)
+                seen_seq = _frame_seq
+                np.multiply(contact_data_norm, 255.0, out=scaled)
+                total_counts, peak_counts = _frame_stats
             # Visualize absolute-normalized data
-            vis = (np.clip(contact_data_norm, 0.0, 1.0) * 255).astype(np.uint8)
-            colormap = cv2.applyColorMap(vis, cv2.COLORMAP_VIRIDIS)
-            colormap = cv2.resize(colormap, (512, 512), interpolation=cv2.INTER_NEAREST)
+            np.clip(scaled, 0.0, 255.0, out=scaled)
+            np.copyto(vis, scaled, casting='unsafe')
 
-            # Periodic terminal output
+            # Periodic terminal output (totals come from process_frame, no extra pass)
             now = time.time()
             if ENABLE_STATS and (now - last_stats) >= STATS_PERIOD_SEC:
+                avg_counts = total_counts / (MATRIX_SIZE * MATRIX_SIZE)
                 if USE_FORCE_NORM:
-                    avg_counts = float(_prev_frame.mean() * (MAX_FORCE_N / max(FORCE_GAIN, 1e-9)))
-                    avg_force_n = float(_prev_frame.mean() * MAX_FORCE_N)
+                    avg_force_n = avg_counts * FORCE_GAIN
                     print(f"avg_counts: {avg_counts:.2f}, avg_force_N: {avg_force_n:.3f}")
                 else:
-                    avg_counts = float(_prev_frame.mean() * float(ABSOLUTE_MAX))
-                    peak_counts = float(_prev_frame.max() * float(ABSOLUTE_MAX))
                     print(f"avg_counts: {avg_counts:.2f}, peak_counts: {peak_counts:.2f}")
                 last_stats = now
 
-            if now - last_send >= min_interval:
-                last_send = now
-                ok, jpg = cv2.imencode('.jpg', colormap, [int(cv2.IMWRITE_JPEG_QUALITY), 85])
-                if ok:
-                    yield boundary + headers + jpg.tobytes() + b"\r\n"
-        time.sleep(0.005)
-
-
-@app.route('/')
-def index():
+            last_send = now
+
+            t0 = time.perf_counter()
+            # Comparing 256 bytes is far cheaper than blur + colormap + resize + encode
+            if jpg is None or jpg_quality != quality or not np.array_equal(vis, last_vis):
+                colormap = apply_gaussian_blur(vis)
+                if not CLIENT_COLORMAP:  # otherwise single channel → grayscale JPEG
+                    colormap = np.take(_VIRIDIS_LUT, colormap, axis=0, out=colored)
+                if STREAM_FORMAT != "png" and STREAM_SIZE > MATRIX_SIZE:
+                    colormap = _upscale_nearest(colormap, STREAM_SIZE)
+                jpg = _encode_frame(colormap, quality)
+                if jpg is None:
+                    continue
+                jpg_quality = quality
+                vis, last_vis = last_vis, vis
+            yield boundary + headers + jpg + b"\r\n"
+            done_seq = _frame_seq
+            metrics["missed"] += done_seq - seen_seq
+
+            frame_ms = 0.9 * metrics["frame_ms"] + 0.1 * (time.perf_counter() - t0) * 1000.0
+            metrics.update(sent=metrics["sent"] + 1, frame_ms=frame_ms)
+            if "quality" in metrics:
+                if frame_ms > slow_ms:
+                    quality = JPEG_MIN_QUALITY
+                elif frame_ms < recovered_ms:
+                    quality = JPEG_QUALITY
+                metrics["quality"] = quality
+    finally:
+        with _streams_lock:
+            del _streams[stream_id]
+
+
+def _metrics_text():
+    # Plain-text "name{labels} value" lines, one set per open stream (quality: JPEG only)
+    with _frame_cv:
+        lines = [f"frame_seq {_frame_seq}"]
+    with _streams_lock:
+        streams = [(sid, dict(m)) for sid, m in _streams.items()]
+    lines.append(f"streams {len(streams)}")
+    for sid, m in streams:
+        lines += [f'stream_{name}{{stream="{sid}"}} {v:.2f}' if name == "frame_ms"
+                  else f'stream_{name}{{stream="{sid}"}} {v}' for name, v in m.items()]
+    return "\n".join(lines) + "\n"
+
+
+# VIRIDIS as 256 BGR entries, the same table cv2.applyColorMap uses
+_VIRIDIS_LUT = cv2.applyColorMap(np.arange(256, dtype=np.uint8).reshape(256, 1), cv2.COLORMAP_VIRIDIS).reshape(256, 3)
+
+# Draws the grayscale stream into a canvas and maps each gray level through the LUT
+_COLORIZE_JS = """
+                <script>
+                    const LUT = new Uint8Array(%s);  // RGB per gray level
+                    const src = document.getElementById('src');
+                    const view = document.getElementById('view');
+                    const ctx = view.getContext('2d', { willReadFrequently: true });
+                    function draw() {
+                        if (src.naturalWidth) {
+                            if (view.width !== src.naturalWidth || view.height !== src.naturalHeight) {
+                                view.width = src.naturalWidth;
+                                view.height = src.naturalHeight;
+                            }
+                            ctx.drawImage(src, 0, 0);
+                            const img = ctx.getImageData(0, 0, view.width, view.height);
+                            const d = img.data;
+                            for (let i = 0; i < d.length; i += 4) {
+                                const k = d[i] * 3;
+                                d[i] = LUT[k]; d[i + 1] = LUT[k + 1]; d[i + 2] = LUT[k + 2];
+                            }
+                            ctx.putImageData(img, 0, 0);
+                        }
+                        requestAnimationFrame(draw);
+                    }
+                    requestAnimationFrame(draw);
+                </script>
+""" % _VIRIDIS_LUT[:, ::-1].ravel().tolist()
+
+
+def _index_html() -> str:
+    if CLIENT_COLORMAP:
+        view = """<img id="src" class="hidden" src="/stream" alt="" />
+                    <canvas id="view" class="frame"></canvas>""" + _COLORIZE_JS
+    else:
+        view = """<img class="frame" src="/stream" alt="VITAC" />"""
     return (
         """
         <html>
@@ -207,29 +552,87 @@ def index():
                 <style>
                     html, body { height:100%; margin:0; background:#111; color:#ddd; font-family:Arial, sans-serif; }
                     .wrap { min-height:100vh; display:flex; align-items:center; justify-content:center; }
-                    img { width:96vmin; height:96vmin; object-fit:contain; border:1px solid #333; background:#000;
-                          image-rendering: pixelated; image-rendering: crisp-edges; }
+                    .frame { width:96vmin; height:96vmin; object-fit:contain; border:1px solid #333; background:#000;
+                             image-rendering: pixelated; image-rendering: crisp-edges; }
+                    .hidden { position:absolute; width:1px; height:1px; opacity:0; pointer-events:none; }
                 </style>
             </head>
             <body>
                 <div class="wrap">
-                    <img src="/stream" alt="VITAC" />
+                    __VIEW__
                 </div>
             </body>
         </html>
-        """
+        """.replace("__VIEW__", view)
     )
 
 
+@app.route('/')
+def index():
+    return _index_html()
+
+
 @app.route('/stream')
 def stream():
     return Response(_mjpeg_generator(), mimetype='multipart/x-mixed-replace; boundary=frame')
 
 
+_RECALIBRATE_MSG = "Recapturing baseline — keep the sensor unloaded."
+
+
+@app.route('/recalibrate')
+def recalibrate():
+    _recalibrate.set()
+    return _RECALIBRATE_MSG
+
+
+@app.route('/metrics')
+def metrics():
+    return Response(_metrics_text(), mimetype='text/plain')
+
+
+# -------------------- RAW MJPEG SERVER --------------------
+class _MJPEGHandler(socketserver.StreamRequestHandler):
+    # Just enough HTTP/1.0 for a browser: parse the request line, ignore headers,
+    # then write the response straight to the socket
+    def handle(self):
+        try:
+            parts = self.rfile.readline(65537).split()
+            while self.rfile.readline(65537) not in (b"\r\n", b"\n", b""):
+                pass
+            path = parts[1].split(b"?", 1)[0] if len(parts) > 1 else b"/"
+            if path == b"/stream":
+                self.wfile.write(b"HTTP/1.0 200 OK\r\n"
+                                 b"Cache-Control: no-cache\r\n"
+                                 b"Content-Type: multipart/x-mixed-replace; boundary=frame\r\n\r\n")
+                for chunk in _mjpeg_generator():
+                    self.wfile.write(chunk)
+            elif path == b"/":
+                self._reply(b"200 OK", _index_html())
+            elif path == b"/recalibrate":
+                _recalibrate.set()
+                self._reply(b"200 OK", _RECALIBRATE_MSG)
+            elif path == b"/metrics":
+                self._reply(b"200 OK", _metrics_text(), b"text/plain")
+            else:
+                self._reply(b"404 Not Found", "Not Found")
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client went away
+
+    def _reply(self, status, text, content_type=b"text/html"):
+        body = text.encode("utf-8")
+        self.wfile.write(b"HTTP/1.0 " + status + b"\r\n"
+                         b"Content-Type: " + content_type + b"; charset=utf-8\r\n"
+                         b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body)
+
+
+class _MJPEGServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
 # -------------------- MAIN --------------------
 def main():
-    global contact_data_norm, flag, _prev_frame
-
     try:
         serDev = serial.Serial(PORT, BAUD, timeout=0.05)
     except Exception as e:
@@ -243,11 +646,16 @@ def main():
     serialThread.daemon = True
     serialThread.start()
 
-    _prev_frame = np.zeros_like(contact_data_norm)
     lan_ip = _get_local_ip()
     print(f"🌐 Web server started at: http://{WEB_HOST}:{WEB_PORT} (LAN: http://{lan_ip}:{WEB_PORT})")
 
-    app.run(host=WEB_HOST, port=WEB_PORT, debug=False, use_reloader=False, threaded=False)
+    if USE_RAW_MJPEG_SERVER:
+        with _MJPEGServer((WEB_HOST, WEB_PORT), _MJPEGHandler) as server:
+            server.serve_forever()
+    elif WAITRESS_AVAILABLE:
+        waitress_serve(app, host=WEB_HOST, port=WEB_PORT, threads=WEB_THREADS)
+    else:
+        app.run(host=WEB_HOST, port=WEB_PORT, debug=False, use_reloader=False, threaded=True)
 
 
 if __name__ == '__main__':
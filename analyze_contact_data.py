@@ -4,6 +4,8 @@ Simplified script to analyze tactile contact data without OCR.
 Paste your contact data matrices directly when prompted.
 """
 
+import re
+import warnings
 import numpy as np
 import matplotlib.pyplot as plt
 
@@ -16,12 +18,13 @@ FORCE_LEVELS = [1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0, 10.0]  # Add/modify as n
 # Choose reduction metric
 def sum_positive(M: np.ndarray) -> float:
     """Sum of all positive values (good for total contact intensity)"""
-    return np.sum(M[M > 0])
+    return float(np.maximum(M, 0).sum())
 
 def mean_positive(M: np.ndarray) -> float:
     """Mean of positive values (good for average intensity)"""
-    vals = M[M > 0]
-    return float(vals.mean()) if vals.size else 0.0
+    pos = M > 0
+    n = np.count_nonzero(pos)
+    return float(np.sum(M, where=pos)) / n if n else 0.0
 
 def max_value(M: np.ndarray) -> float:
     """Maximum value (good for peak contact)"""
@@ -29,38 +32,41 @@ def max_value(M: np.ndarray) -> float:
 
 def count_positive(M: np.ndarray) -> float:
     """Count of positive taxels (good for contact area)"""
-    return float(np.sum(M > 0))
+    return float(np.count_nonzero(M > 0))
 
 # Select metric here
 REDUCE = sum_positive   # <-- Change to mean_positive, max_value, or count_positive
 
 # -------------------- Parsing utilities ---------------------
+# Header ("Frame #...") and separator ("====", blank) lines of the terminal dump
+_HEADER_RE = re.compile(r'^[ \t]*(?:Frame #.*|[= -]*)$', re.M)
+
 def parse_matrix_from_text(text: str) -> np.ndarray:
     """
     Parse a 16x16 matrix from pasted terminal output.
     Extracts numbers, ignoring header/footer lines.
     """
-    lines = [ln.strip() for ln in text.strip().split('\n')]
-    
-    # Filter out header/footer lines
-    lines = [ln for ln in lines if not ln.startswith('Frame #')]
-    lines = [ln for ln in lines if not set(ln) <= set('= -')]  # Remove separator lines
+    cleaned = _HEADER_RE.sub('', text.strip())
     
-    # Extract all numbers
-    numbers = []
-    for ln in lines:
-        parts = ln.split()
-        for p in parts:
+    # Tokenize and convert in NumPy's C loop; stray non-numeric tokens fall back to a per-token scan
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', DeprecationWarning)  # NumPy < 2 only warns
+            numbers = np.fromstring(cleaned, sep=' ')
+    except (ValueError, DeprecationWarning):
+        values = []
+        for p in cleaned.split():
             try:
-                numbers.append(float(p))
+                values.append(float(p))
             except ValueError:
                 continue
+        numbers = np.array(values)
     
     # Try to reshape to 16x16
-    if len(numbers) >= ROWS * COLS:
-        return np.array(numbers[:ROWS*COLS]).reshape(ROWS, COLS)
+    if numbers.size >= ROWS * COLS:
+        return numbers[:ROWS*COLS].reshape(ROWS, COLS)
     else:
-        raise ValueError(f"Expected {ROWS*COLS} numbers, found {len(numbers)}")
+        raise ValueError(f"Expected {ROWS*COLS} numbers, found {numbers.size}")
 
 # -------------------- Main pipeline -------------------------
 forces = []
@@ -120,10 +126,12 @@ if len(signals) >= 2:
         for f, s in zip(forces, signals):
             writer.writerow([f, s])
     
-    np.save("matrices_16x16.npy", np.array(matrices, dtype=float))
+    # The pasted values have one decimal; float32 holds them, float64 only doubles the file
+    M = np.array(matrices, dtype=np.float32)
+    np.savez_compressed("matrices_16x16.npz", matrices=M, forces=np.asarray(forces, dtype=np.float32))
     
     print("\n" + "="*70)
-    print(f"✓ Saved: {out_csv} and matrices_16x16.npy")
+    print(f"✓ Saved: {out_csv} and matrices_16x16.npz")
     print("="*70)
     
     # Sort by force for plotting
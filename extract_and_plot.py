@@ -245,9 +245,11 @@ with open(out_csv, "w", newline="") as fp:
     for f, s in zip(forces, signals):
         writer.writerow([f, s])
 
-np.save("matrices_16x16.npy", np.array(matrices, dtype=float))
+# Compressed, as float32 (plenty for one-decimal values)
+M = np.array(matrices, dtype=np.float32)
+np.savez_compressed("matrices_16x16.npz", matrices=M, forces=np.asarray(forces, dtype=np.float32))
 
-print(f"\n✓ Saved: {out_csv} and matrices_16x16.npy")
+print(f"\n✓ Saved: {out_csv} and matrices_16x16.npz")
 
 # Plot
 plt.figure(figsize=(10, 6))
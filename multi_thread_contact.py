@@ -19,81 +19,77 @@ from scipy.ndimage import gaussian_filter
 contact_data = np.zeros((16,16))
 flag = False
 
+def _read_frames(serDev, frame):
+    # Yields each time a complete 16-row frame has been parsed into frame (in place).
+    # One bulk read per wake-up and one np.fromstring per frame instead of a
+    # readline() + int() per value.
+    rx = bytearray()
+    rows = None  # lines of the current frame; None until the first frame boundary
+    while True:
+        try:
+            rx += serDev.read(max(1, serDev.in_waiting))
+        except serial.SerialException:
+            time.sleep(0.05)  # transient port error; keep the reader thread alive
+            continue
+        lines = rx.split(b"\n")
+        rx = lines.pop()  # partial last line, completed by the next read
+        for line in lines:
+            # Rows stay raw bytes: np.fromstring treats the trailing \r as whitespace,
+            # so only short lines (possible frame boundaries) are stripped
+            if len(line) < 2*16 and len(line.strip()) < 10:
+                if rows is not None and len(rows) == 16:
+                    # Parsed wide and range-checked: an int16 parse would wrap 40000 silently
+                    try:
+                        values = np.fromstring(b" ".join(rows), dtype=np.int64, sep=" ")
+                    except ValueError:
+                        values = None  # garbled bytes; drop the frame
+                    if (values is not None and values.size == frame.size
+                            and -32768 <= values.min() and values.max() <= 32767):
+                        frame[:] = values.reshape(frame.shape)
+                        yield
+                rows = []
+                continue
+            if rows is not None:
+                rows.append(line)
+
 def readThread(serDev):
     global contact_data, flag
-    data_tac = []
+    frame = np.empty((16,16), dtype=np.int16)
+    frames = _read_frames(serDev, frame)
+    data_tac = np.empty((31,16,16), dtype=np.int16)  # baseline frames, filled in place
     num = 0
     t1=0
-    backup = None
     flag=False
-    current = None
     frame_counter = 0
     last_print_time = 0.0
-    while True:
-        if serDev.in_waiting > 0:
-            try:
-                line = serDev.readline().decode('utf-8').strip()
-            except:
-                line = ""
-            if len(line) < 10:
-                if current is not None and len(current) == 16:
-                    backup = np.array(current)
-                    print("fps",1/(time.time()-t1))
-                    t1 =time.time()
-                    data_tac.append(backup)
-                    num += 1
-                    if num > 30:
-                        break
-                current = []
-                continue
-            if current is not None:
-                str_values = line.split()
-                int_values = [int(val) for val in str_values]
-                matrix_row = int_values
-                current.append(matrix_row) 
-
-    data_tac = np.array(data_tac)
-    median = np.median(data_tac, axis=0)
+    for _ in frames:
+        print("fps",1/(time.time()-t1))
+        t1 =time.time()
+        data_tac[num] = frame
+        num += 1
+        if num > 30:
+            break
+
+    median = np.median(data_tac[:num], axis=0)
     flag=True
     print("Finish Initialization!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!")
 
 
-    while True:
-        if serDev.in_waiting > 0:
-            try:
-                line = serDev.readline().decode('utf-8').strip()
-                # print("fps",1/(time.time()-t1))
-                # t1 =time.time()
-            except:
-                line = ""
-            if len(line) < 10:
-                if current is not None and len(current) == 16:
-                    backup = np.array(current)
-                    frame_counter += 1
-                current = []
-                if backup is not None:
-                    contact_data[:] = backup-median
-                    
-                    # Print contact_data every 2 seconds
-                    now = time.time()
-                    if now - last_print_time >= 2.0:
-                        print("\n" + "="*70)
-                        print(f"Frame #{frame_counter} — Contact Data (median-subtracted)")
-                        print("="*70)
-                        for row in contact_data:
-                            print(" ".join(f"{val:6.1f}" for val in row))
-                        print("="*70 + "\n")
-                        last_print_time = now
+    for _ in frames:
+        frame_counter += 1
+        contact_data[:] = frame-median
+
+        # Print contact_data every 2 seconds
+        now = time.time()
+        if now - last_print_time >= 2.0:
+            print("\n" + "="*70)
+            print(f"Frame #{frame_counter} — Contact Data (median-subtracted)")
+            print("="*70)
+            for row in contact_data:
+                print(" ".join(f"{val:6.1f}" for val in row))
+            print("="*70 + "\n")
+            last_print_time = now
 
-                continue
-            if current is not None:
-                str_values = line.split()
-                int_values = [int(val) for val in str_values]
-                matrix_row = int_values
-                current.append(matrix_row) 
-                    
-                continue
-        
 
 # PORT = "left_gripper_right_finger"
 PORT ='/dev/cu.usbserial-AQ02VE0X'